@@ -2,6 +2,9 @@ import ttkbootstrap as ttk
 from ttkbootstrap.constants import *
 from ttkbootstrap.tooltip import ToolTip
 import threading
+import queue
+import itertools
+import functools
 import time
 import pymongo
 import psutil
@@ -9,27 +12,47 @@ import win32process
 import win32gui
 import win32con
 import win32api
-from ctypes import Structure, windll, c_uint, sizeof, byref
+import win32event
+import ctypes
+from ctypes import Structure, windll, wintypes, c_uint, sizeof, byref
 import getpass
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 
 # --- CONFIGURATION ---
 IDLE_THRESHOLD_SECONDS = 60
 SWITCH_CONFIRM_SECONDS = 3
+SUSPEND_WAIT_SECONDS = 1
 GUI_UPDATE_MS = 5000
 HEARTBEAT_SECONDS = 30
+STATUS_REFRESH_SECONDS = 60  # unchanged status is rewritten at most this often; the dashboard times out after 2 min
+IDLE_POLL_SECONDS = 5
+FLUSH_MAX_PENDING = 32
+FLUSH_INTERVAL_SECONDS = 10
+PROCESS_NAME_TTL_SECONDS = 300
+WRITE_BATCH_MAX = 64
 
 # --- MongoDB Connection ---
 try:
-    client = pymongo.MongoClient("mongodb://localhost:27017/")
+    # The tracker needs a handful of sockets at most (writer thread + GUI refresh); connect lazily
+    # and fail fast so an unavailable server never blocks the GUI for the 30 s default.
+    client = pymongo.MongoClient(
+        "mongodb://localhost:27017/",
+        maxPoolSize=4, minPoolSize=0, connect=False,
+        serverSelectionTimeoutMS=2000, appname="activity-tracker",
+    )
     db = client["activity_tracker"]
     collection = db["daily_summary"]
+    # Status heartbeats are superseded every HEARTBEAT_SECONDS, so they are sent unacknowledged
+    # (w=0) and never wait on a server round-trip; activity totals keep the default concern.
+    heartbeat_collection = db.get_collection("daily_summary", write_concern=pymongo.WriteConcern(w=0))
     print("Connected to MongoDB")
 except pymongo.errors.ConnectionFailure as e:
     print(f"Could not connect to MongoDB: {e}")
     client = None
 
 # --- Helper Function ---
+# Callers pass whole seconds so float durations don't fill the cache with unique keys
+@functools.lru_cache(maxsize=8192)
 def format_seconds(seconds):
     s = int(seconds)
     h, s = divmod(s, 3600)
@@ -40,126 +63,353 @@ def format_seconds(seconds):
 class LASTINPUTINFO(Structure):
     _fields_ = [('cbSize', c_uint), ('dwTime', c_uint)]
 
+# Only the tracker thread probes idle time, so one struct and the bound functions are reused
+_last_input_info = LASTINPUTINFO()
+_last_input_info.cbSize = sizeof(_last_input_info)
+_GetLastInputInfo = windll.user32.GetLastInputInfo
+_GetLastInputInfo.argtypes = [ctypes.POINTER(LASTINPUTINFO)]
+_GetLastInputInfo.restype = wintypes.BOOL
+_GetTickCount = windll.kernel32.GetTickCount
+_GetTickCount.argtypes = []
+_GetTickCount.restype = wintypes.DWORD
+
 def get_idle_time():
-    last_input_info = LASTINPUTINFO()
-    last_input_info.cbSize = sizeof(last_input_info)
-    windll.user32.GetLastInputInfo(byref(last_input_info))
-    millis = windll.kernel32.GetTickCount() - last_input_info.dwTime
-    return millis / 1000.0
+    _GetLastInputInfo(byref(_last_input_info))
+    # Both counters are 32-bit milliseconds; mask so the ~49.7-day wraparound stays positive
+    return ((_GetTickCount() - _last_input_info.dwTime) & 0xFFFFFFFF) * 0.001
+
+# --- Process Names ---
+PROCESS_QUERY_LIMITED_INFORMATION = 0x1000
+
+_OpenProcess = windll.kernel32.OpenProcess
+_OpenProcess.argtypes = [wintypes.DWORD, wintypes.BOOL, wintypes.DWORD]
+_OpenProcess.restype = wintypes.HANDLE
+_QueryFullProcessImageNameW = windll.kernel32.QueryFullProcessImageNameW
+_QueryFullProcessImageNameW.argtypes = [wintypes.HANDLE, wintypes.DWORD, wintypes.LPWSTR, ctypes.POINTER(wintypes.DWORD)]
+_QueryFullProcessImageNameW.restype = wintypes.BOOL
+_CloseHandle = windll.kernel32.CloseHandle
+_CloseHandle.argtypes = [wintypes.HANDLE]
+_CloseHandle.restype = wintypes.BOOL
+# Names are only resolved on the tracker thread, so one buffer is reused
+_image_name_buf = ctypes.create_unicode_buffer(1024)
+
+def get_process_name(pid):
+    # One limited-rights handle and one query; psutil is only the fallback (e.g. protected processes)
+    handle = _OpenProcess(PROCESS_QUERY_LIMITED_INFORMATION, False, pid)
+    if not handle:
+        return psutil.Process(pid).name()
+    try:
+        size = wintypes.DWORD(len(_image_name_buf))
+        if not _QueryFullProcessImageNameW(handle, 0, _image_name_buf, byref(size)):
+            return psutil.Process(pid).name()
+        return _image_name_buf.value.rsplit('\\', 1)[-1]
+    finally:
+        _CloseHandle(handle)
+
+# --- Tracker Thread Messages (posted from the GUI's power-event handler) ---
+WM_TRACKER_SUSPEND = win32con.WM_APP + 1
+WM_TRACKER_RESUME = win32con.WM_APP + 2
+
+# --- Foreground Window Events ---
+EVENT_SYSTEM_FOREGROUND = 0x0003
+WINEVENT_OUTOFCONTEXT = 0x0000
+WinEventProcType = ctypes.WINFUNCTYPE(None, wintypes.HANDLE, wintypes.DWORD, wintypes.HWND, wintypes.LONG, wintypes.LONG, wintypes.DWORD, wintypes.DWORD)
+
+_SetWinEventHook = windll.user32.SetWinEventHook
+_SetWinEventHook.argtypes = [wintypes.DWORD, wintypes.DWORD, wintypes.HMODULE, WinEventProcType, wintypes.DWORD, wintypes.DWORD, wintypes.DWORD]
+_SetWinEventHook.restype = wintypes.HANDLE
+_UnhookWinEvent = windll.user32.UnhookWinEvent
+_UnhookWinEvent.argtypes = [wintypes.HANDLE]
 
 # --- Activity Tracking Thread ---
 class ActivityTracker(threading.Thread):
     def __init__(self, app):
         threading.Thread.__init__(self)
         self.app = app
-        self.running = True
+        self._stop_evt = threading.Event()
+        self._stop_reason = "Exited gracefully"
+        # Set by suspend() on the GUI thread before it posts WM_TRACKER_SUSPEND
+        self._suspend_at = 0.0
+        self._suspend_written = threading.Event()
         self.user_id = getpass.getuser()
         self.current_app = ""
-        self.start_time = time.time()
+        self.start_time = time.monotonic()
         self.idle = False
         self.potential_next_app = ""
         self.switch_pending_time = None
         self.last_heartbeat_time = 0
+        self._last_status_written = (None, 0.0)
+        # (today_str, doc_id, expires_at): recomputed only once local midnight passes
+        self._day_cache = ("", "", 0.0)
+        # Accumulated $inc durations keyed by (doc_id, date, field), written in one bulk_write
+        self._pending = {}
+        self._pending_lock = threading.Lock()
+        self._last_flush = time.monotonic()
+        # (hwnd, pid) -> (resolved_at, name); a reused pid never comes back with the same window handle
+        self._pid_name_cache = {}
+        # (collection, op, amount) items persisted in order by the writer thread; an Event is set once
+        # everything queued before it is written; None stops it
+        self._write_q = queue.Queue()
+        self._writer = threading.Thread(target=self._writer_loop, daemon=True)
 
     def run(self):
-        self.update_status_in_db("Online")
+        self._writer.start()
+        self.update_status_in_db("Online", force=True)
         self.current_app = self.get_active_app()
-        self.start_time = time.time()
-
-        while self.running:
-            now = time.time()
-            if now - self.last_heartbeat_time > HEARTBEAT_SECONDS:
-                current_status = "Idle" if self.idle else "Online"
-                self.update_status_in_db(current_status)
-                self.last_heartbeat_time = now
-
-            idle_seconds = get_idle_time()
-            active_app_name = self.get_active_app()
-
-            if idle_seconds > IDLE_THRESHOLD_SECONDS:
-                if not self.idle:
-                    self.update_database(self.current_app, time.time() - self.start_time)
-                    self.idle = True
-                    self.start_time = time.time()
-                    self.clear_pending_switch()
-                    self.update_status_in_db("Idle")
-                self.app.update_status(f"Status: Idle ({int(idle_seconds)}s)")
+        self.start_time = time.monotonic()
+
+        # Foreground changes arrive as WinEvents on this thread while it pumps messages;
+        # keep a reference to the ctypes callback for as long as the hook is installed.
+        self._win_event_proc = WinEventProcType(self.on_foreground_event)
+        hook = _SetWinEventHook(EVENT_SYSTEM_FOREGROUND, EVENT_SYSTEM_FOREGROUND, 0, self._win_event_proc, 0, 0, WINEVENT_OUTOFCONTEXT)
+        try:
+            while not self._stop_evt.is_set():
+                now = time.monotonic()
+                self.poll(now)
+                timeout = IDLE_POLL_SECONDS
+                if self.switch_pending_time:
+                    remaining = self.switch_pending_time + SWITCH_CONFIRM_SECONDS - now
+                    timeout = min(timeout, max(remaining, 0) + 0.1)
+                win32event.MsgWaitForMultipleObjects([], False, int(timeout * 1000), win32event.QS_ALLINPUT)
+                self._pump_messages()
+        finally:
+            if hook: _UnhookWinEvent(hook)
+            # The final slice, flush and Offline write happen here so every tracker state change
+            # stays on this thread and nothing is queued after the writer's sentinel
+            now = time.monotonic()
+            activity = "idle" if self.idle else self.current_app
+            self.update_database(activity, now - self.start_time)
+            self._flush_pending(now)
+            self.update_status_in_db("Offline", reason=self._stop_reason, force=True)
+            self._write_q.put(None)
+            self._writer.join(timeout=5)
+
+    def _pump_messages(self):
+        # Dispatching window messages also delivers the WinEvent callbacks; thread messages
+        # posted by suspend()/resume() have no window and are handled here.
+        while True:
+            found, msg = win32gui.PeekMessage(None, 0, 0, win32con.PM_REMOVE)
+            if not found: return
+            if not msg[0] and msg[1] == WM_TRACKER_SUSPEND:
+                self.on_suspend(self._suspend_at)
+            elif not msg[0] and msg[1] == WM_TRACKER_RESUME:
+                self.on_resume(time.monotonic())
             else:
-                if self.idle:
-                    self.update_database("idle", time.time() - self.start_time)
-                    self.idle = False
-                    self.current_app = active_app_name
-                    self.start_time = time.time()
-                    self.update_status_in_db("Online")
-                if active_app_name != self.current_app:
-                    self.handle_potential_switch(active_app_name)
-                else:
-                    self.clear_pending_switch()
-                self.app.update_status(f"Status: Active [{self.current_app}]")
-            time.sleep(1)
-
-    def handle_potential_switch(self, active_app_name):
-        if self.potential_next_app != active_app_name:
-            self.potential_next_app = active_app_name
-            self.switch_pending_time = time.time()
-        else:
-            if self.switch_pending_time and time.time() - self.switch_pending_time > SWITCH_CONFIRM_SECONDS:
-                duration = self.switch_pending_time - self.start_time
-                self.update_database(self.current_app, duration)
-                self.current_app = self.potential_next_app
-                self.start_time = self.switch_pending_time
+                win32gui.TranslateMessage(msg)
+                win32gui.DispatchMessage(msg)
+
+    def suspend(self):
+        # The sleep starts now, not whenever the tracker gets to the message; wait briefly so the
+        # final slice and the Offline status reach MongoDB before the machine actually sleeps
+        self._suspend_at = time.monotonic()
+        self._suspend_written.clear()
+        if self.is_alive() and self._post_to_tracker(WM_TRACKER_SUSPEND):
+            self._suspend_written.wait(timeout=SUSPEND_WAIT_SECONDS)
+
+    def resume(self):
+        self._post_to_tracker(WM_TRACKER_RESUME)
+
+    def _post_to_tracker(self, msg):
+        try:
+            win32api.PostThreadMessage(self.native_id, msg, 0, 0)
+            return True
+        except win32api.error:
+            return False
+
+    def on_suspend(self, now):
+        # Close the running slice before sleep; the time asleep is never charged to anything
+        activity = "idle" if self.idle else self.current_app
+        self.update_database(activity, now - self.start_time)
+        self.start_time = now
+        self.clear_pending_switch()
+        self._flush_pending(now)
+        self.update_status_in_db("Offline", reason="System sleep", force=True)
+        self._write_q.put(self._suspend_written)
+
+    def on_resume(self, now):
+        self.start_time = now
+        self.clear_pending_switch()
+        if not self.idle: self.current_app = self.get_active_app(now=now)
+        self.update_status_in_db("Idle" if self.idle else "Online", force=True)
+
+    def poll(self, now):
+        # One timestamp per poll: durations ending here and the next start_time are the same instant
+        if now - self.last_heartbeat_time > HEARTBEAT_SECONDS:
+            current_status = "Idle" if self.idle else "Online"
+            self.update_status_in_db(current_status)
+            self.last_heartbeat_time = now
+        if len(self._pending) >= FLUSH_MAX_PENDING or now - self._last_flush > FLUSH_INTERVAL_SECONDS:
+            self._flush_pending(now)
+
+        idle_seconds = get_idle_time()
+        if idle_seconds > IDLE_THRESHOLD_SECONDS:
+            if not self.idle:
+                self.update_database(self.current_app, now - self.start_time)
+                self.idle = True
+                self.start_time = now
                 self.clear_pending_switch()
+                self.update_status_in_db("Idle", force=True)
+            self.app.update_status(f"Status: Idle ({int(idle_seconds)}s)")
+        else:
+            if self.idle:
+                # Input resumed idle_seconds ago, not at this (up to IDLE_POLL_SECONDS late) check
+                active_since = now - idle_seconds
+                self.update_database("idle", active_since - self.start_time)
+                self.idle = False
+                self.current_app = self.get_active_app(now=now)
+                self.start_time = active_since
+                self.update_status_in_db("Online", force=True)
+            self.confirm_pending_switch(now)
+            self.app.update_status(f"Status: Active [{self.current_app}]")
+
+    def on_foreground_event(self, hook, event, hwnd, id_object, id_child, event_thread, event_time):
+        if self.idle: return
+        now = time.monotonic()
+        active_app_name = self.get_active_app(hwnd, now)
+        if active_app_name == self.current_app:
+            self.clear_pending_switch()
+        elif active_app_name != self.potential_next_app:
+            self.potential_next_app = active_app_name
+            self.switch_pending_time = now
+
+    def confirm_pending_switch(self, now):
+        if self.switch_pending_time and now - self.switch_pending_time > SWITCH_CONFIRM_SECONDS:
+            duration = self.switch_pending_time - self.start_time
+            self.update_database(self.current_app, duration)
+            self.current_app = self.potential_next_app
+            self.start_time = self.switch_pending_time
+            self.clear_pending_switch()
 
     def clear_pending_switch(self):
         self.potential_next_app = ""
         self.switch_pending_time = None
 
-    def get_active_app(self):
+    def get_active_app(self, hwnd=None, now=None):
         try:
-            hwnd = win32gui.GetForegroundWindow()
+            if hwnd is None: hwnd = win32gui.GetForegroundWindow()
             _, pid = win32process.GetWindowThreadProcessId(hwnd)
             if pid <= 0: return "LockScreen"
-            process = psutil.Process(pid)
-            return process.name()
+            if now is None: now = time.monotonic()
+            key = (hwnd, pid)
+            cached = self._pid_name_cache.get(key)
+            if cached and now - cached[0] < PROCESS_NAME_TTL_SECONDS:
+                return cached[1]
+            name = get_process_name(pid)
+            if len(self._pid_name_cache) > 256:
+                self._pid_name_cache = {k: v for k, v in self._pid_name_cache.items() if now - v[0] < PROCESS_NAME_TTL_SECONDS}
+            self._pid_name_cache[key] = (now, name)
+            return name
         except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
             return "Unknown"
         except Exception:
             return "Unknown"
 
-    def update_status_in_db(self, status, reason=None):
+    def current_day(self):
+        today_str, doc_id, expires_at = self._day_cache
+        if time.time() >= expires_at:
+            now = datetime.now()
+            today_str = now.strftime("%Y-%m-%d")
+            doc_id = f"{self.user_id}_{today_str}"
+            midnight = datetime.combine(now.date() + timedelta(days=1), datetime.min.time())
+            self._day_cache = (today_str, doc_id, midnight.timestamp())
+        return today_str, doc_id
+
+    def update_status_in_db(self, status, reason=None, force=False):
         if not client: return
-        today_str = datetime.now().strftime("%Y-%m-%d")
-        doc_id = f"{self.user_id}_{today_str}"
+        now = time.monotonic()
+        last_status, last_written = self._last_status_written
+        if not force and status == last_status and now - last_written < STATUS_REFRESH_SECONDS: return
+        self._last_status_written = (status, now)
+        today_str, doc_id = self.current_day()
         update_doc = {
             "$set": {"status": status, "last_seen": datetime.now(timezone.utc)},
             "$setOnInsert": {"user_id": self.user_id, "date": today_str}
         }
         if reason:
             update_doc["$set"]["offline_reason"] = reason
-        collection.update_one({"_id": doc_id}, update_doc, upsert=True)
+        self._write_q.put((heartbeat_collection, pymongo.UpdateOne({"_id": doc_id}, update_doc, upsert=True), None))
         print(f"Status updated to: {status}" + (f" (Reason: {reason})" if reason else ""))
 
     def update_database(self, activity_name, duration_seconds):
         if duration_seconds < 1 or not activity_name or activity_name == "Unknown": return
         if not client: return
-        today_str = datetime.now().strftime("%Y-%m-%d")
-        doc_id = f"{self.user_id}_{today_str}"
-        update_field = f"applications.{activity_name.replace('.', '_')}" if activity_name != "idle" else "total_idle_seconds"
-        collection.update_one({"_id": doc_id}, {"$inc": {update_field: duration_seconds}}, upsert=True)
+        today_str, doc_id = self.current_day()
+        if activity_name == "idle":
+            update_field = "total_idle_seconds"
+        else:
+            update_field = f"applications.{activity_name.replace('.', '_')}"
+        self._add_pending([((doc_id, today_str, update_field), duration_seconds)])
+
+    def _add_pending(self, amounts):
+        with self._pending_lock:
+            for key, seconds in amounts:
+                self._pending[key] = self._pending.get(key, 0) + seconds
+
+    def _flush_pending(self, now):
+        with self._pending_lock:
+            pending, self._pending = self._pending, {}
+            self._last_flush = now
+        if not pending or not client: return
+        for key, seconds in pending.items():
+            doc_id, today_str, field = key
+            # The (key, seconds) amount travels with the op so a failed write can be re-queued
+            self._write_q.put((collection, pymongo.UpdateOne(
+                {"_id": doc_id},
+                {"$inc": {field: seconds}, "$setOnInsert": {"user_id": self.user_id, "date": today_str}},
+                upsert=True,
+            ), (key, seconds)))
+
+    def _writer_loop(self):
+        while True:
+            items = [self._write_q.get()]
+            while len(items) < WRITE_BATCH_MAX:
+                try:
+                    items.append(self._write_q.get_nowait())
+                except queue.Empty:
+                    break
+            stopping = any(item is None for item in items)
+            written = [item for item in items if isinstance(item, threading.Event)]
+            items = [item for item in items if item is not None and not isinstance(item, threading.Event)]
+            # One bulk_write per run of ops sharing a write concern, ordered so consecutive
+            # status $set writes land in the order they were made
+            for _, run in itertools.groupby(items, key=lambda item: id(item[0])):
+                run = list(run)
+                try:
+                    run[0][0].bulk_write([op for _, op, _ in run], ordered=True)
+                except pymongo.errors.BulkWriteError as e:
+                    # $inc is not idempotent: an ordered bulk stops at its first failed op, so only the ops
+                    # after it were never applied. A write-concern-only failure may have applied them all.
+                    print(f"Could not write to MongoDB: {e}")
+                    write_errors = e.details.get("writeErrors")
+                    if write_errors: self._retry_amounts(run[write_errors[0]["index"] + 1:])
+                except pymongo.errors.ServerSelectionTimeoutError as e:
+                    # No server was reachable, so nothing was sent; hand the $inc amounts back to the next
+                    # flush. Other AutoReconnect errors may follow a write the server already applied.
+                    print(f"Could not reach MongoDB, will retry: {e}")
+                    self._retry_amounts(run)
+                except pymongo.errors.PyMongoError as e:
+                    print(f"Could not write to MongoDB: {e}")
+            for evt in written: evt.set()
+            if stopping: return
+
+    def _retry_amounts(self, run):
+        # Status heartbeats carry no amount; a later heartbeat supersedes them anyway
+        self._add_pending([amount for _, _, amount in run if amount])
 
     def stop(self, reason="Exited gracefully"):
-        if not self.running: return
-        self.running = False
-        duration = time.time() - self.start_time
-        activity = "idle" if self.idle else self.current_app
-        self.update_database(activity, duration)
-        self.update_status_in_db("Offline", reason=reason)
+        if self._stop_evt.is_set(): return
+        self._stop_reason = reason
+        self._stop_evt.set()
+        # Wake the tracker out of its message wait so it exits now rather than at the next poll
+        self._post_to_tracker(win32con.WM_NULL)
+        if self.is_alive(): self.join(timeout=7)
 
 # --- GUI Application with System Event Handling ---
 class App(ttk.Window):
     def __init__(self):
         super().__init__(themename="darkly")
         self.title("Activity Tracker"); self.geometry("650x550"); self.resizable(True, True)
+        self._last_status_text = None; self._refresh_after_id = None
         self._configure_styles(); self._create_widgets()
 
         self.protocol("WM_DELETE_WINDOW", self.on_closing)
@@ -189,6 +439,8 @@ class App(ttk.Window):
         tree_frame = ttk.Frame(card); tree_frame.pack(fill=BOTH, expand=True)
         self.tree = ttk.Treeview(tree_frame, columns=('App', 'Time'), show='headings', style="Custom.Treeview", selectmode="browse")
         self.tree.heading('App', text='Application'); self.tree.heading('Time', text='Total Usage')
+        self._row_iids = {}
+        self._last_applications = None
         self.tree.column('App', width=400, stretch=True); self.tree.column('Time', width=120, anchor=E, stretch=False)
         scrollbar = ttk.Scrollbar(tree_frame, orient=VERTICAL, command=self.tree.yview, bootstyle="round-dark"); self.tree.configure(yscrollcommand=scrollbar.set)
         self.tree.pack(side=LEFT, fill=BOTH, expand=True); scrollbar.pack(side=RIGHT, fill=Y)
@@ -211,30 +463,55 @@ class App(ttk.Window):
         if msg == win32con.WM_POWERBROADCAST:
             if wparam == win32con.PBT_APMSUSPEND:
                 print("System is going to sleep.")
-                self.tracker.update_status_in_db("Offline", reason="System sleep")
+                self.tracker.suspend()
             elif wparam == win32con.PBT_APMRESUMEAUTOMATIC:
                 print("System is resuming.")
-                self.tracker.update_status_in_db("Online")
+                self.tracker.resume()
         
         # Pass all other messages to the original handler
         return win32gui.CallWindowProc(self.old_wndproc, hwnd, msg, wparam, lparam)
 
     def update_status(self, status_text):
+        # Called on every tracker poll; most polls report the same status
+        if status_text == self._last_status_text: return
+        self._last_status_text = status_text
         self.status_label.config(text=status_text)
 
+    def _schedule_refresh(self):
+        # The Refresh button also calls update_usage_display; cancel the pending tick so only one timer chain exists
+        if self._refresh_after_id: self.after_cancel(self._refresh_after_id)
+        self._refresh_after_id = self.after(GUI_UPDATE_MS, self.update_usage_display)
+
     def update_usage_display(self):
-        if not client: self.after(GUI_UPDATE_MS, self.update_usage_display); return
-        today_str = datetime.now().strftime("%Y-%m-%d")
-        doc_id = f"{getpass.getuser()}_{today_str}"
-        data = collection.find_one({"_id": doc_id})
-        self.tree.delete(*self.tree.get_children())
+        if not client: self._schedule_refresh(); return
+        _, doc_id = self.tracker.current_day()
+        try:
+            data = collection.find_one({"_id": doc_id}, {"applications": 1, "_id": 0})
+        except pymongo.errors.PyMongoError as e:
+            # Any driver error here would escape the after() callback and end the refresh chain
+            print(f"Could not read from MongoDB: {e}")
+            self._schedule_refresh(); return
+        applications = data.get("applications", {}) if data else {}
+        # Nothing was switched away from since the last refresh
+        if applications == self._last_applications:
+            self._schedule_refresh(); return
+        self._last_applications = applications
+        rows = sorted(applications.items(), key=lambda item: item[1], reverse=True)
+        # Update rows in place instead of rebuilding the tree; only new apps get inserted
         total_seconds = 0
-        if data and "applications" in data:
-            for app, seconds in sorted(data["applications"].items(), key=lambda item: item[1], reverse=True):
-                self.tree.insert('', END, values=(app.replace('_', '.'), format_seconds(seconds)))
-                total_seconds += seconds
-        self.total_time_label.config(text=f"Total: {format_seconds(total_seconds)}")
-        self.after_id = self.after(GUI_UPDATE_MS, self.update_usage_display)
+        for index, (app, seconds) in enumerate(rows):
+            values = (app.replace('_', '.'), format_seconds(int(seconds)))
+            iid = self._row_iids.get(app)
+            if iid is None:
+                self._row_iids[app] = self.tree.insert('', index, values=values)
+            else:
+                self.tree.item(iid, values=values)
+                self.tree.move(iid, '', index)
+            total_seconds += seconds
+        for app in set(self._row_iids).difference(app for app, _ in rows):
+            self.tree.delete(self._row_iids.pop(app))
+        self.total_time_label.config(text=f"Total: {format_seconds(int(total_seconds))}")
+        self._schedule_refresh()
 
     def on_closing(self, reason="Exited gracefully"):
         print(f"Closing application ({reason})...")
@@ -243,8 +520,7 @@ class App(ttk.Window):
             win32api.SetWindowLong(self.hwnd, win32con.GWL_WNDPROC, self.old_wndproc)
         
         self.tracker.stop(reason)
-        self.tracker.join(timeout=2)
-        if hasattr(self, 'after_id'): self.after_cancel(self.after_id)
+        if self._refresh_after_id: self.after_cancel(self._refresh_after_id)
         self.destroy()
 
 if __name__ == "__main__":
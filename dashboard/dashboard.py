@@ -3,17 +3,52 @@ from ttkbootstrap.constants import *
 from ttkbootstrap.widgets import DateEntry
 from ttkbootstrap.tooltip import ToolTip
 import pymongo
+import numpy as np
 import pandas as pd
-import seaborn as sns
-import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
+from matplotlib import cm
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 from datetime import datetime, timedelta, timezone
 import threading
 import time
+import re
+from collections import OrderedDict
+
+DATA_CACHE_SIZE = 32
+STATUS_DEBOUNCE_SECONDS = 5
+STATUS_SWEEP_SECONDS = 60
+STATUS_POLL_SECONDS = 30
+STATUS_POLL_MAX_SECONDS = 120
+STATUS_WATCH_RETRY_SECONDS = 300
+# Explicit layout of query_daily_totals rows; the tracker $incs float durations, so seconds are float64
+DAILY_COLUMNS = ['date', 'productive_seconds', 'idle_seconds']
+DAILY_DTYPES = {'productive_seconds': 'float64', 'idle_seconds': 'float64'}
+# Dates are stored as YYYY-MM-DD strings, which compare correctly as plain strings in range queries
+DATE_RE = re.compile(r"\d{4}-\d{2}-\d{2}")
+# Seconds summed over a document's applications map; shared by the status page and the daily chart
+APP_SECONDS_EXPR = {"$reduce": {
+    "input": {"$objectToArray": {"$ifNull": ["$applications", {}]}},
+    "initialValue": 0,
+    "in": {"$add": ["$$value", "$$this.v"]},
+}}
 
 # --- Database Connection ---
+_client = None
+
+def get_client():
+    # One pooled client per process. zstd compresses the wire traffic when the zstandard package is
+    # installed; without it the driver warns and talks uncompressed rather than paying for zlib.
+    global _client
+    if _client is None:
+        _client = pymongo.MongoClient(
+            "mongodb://localhost:27017/",
+            maxPoolSize=8, compressors="zstd", retryReads=True,
+            serverSelectionTimeoutMS=2000, appname="activity-dashboard",
+        )
+    return _client
+
 try:
-    client = pymongo.MongoClient("mongodb://localhost:27017/")
+    client = get_client()
     db = client["activity_tracker"]
     collection = db["daily_summary"]
     print("Dashboard connected to MongoDB.")
@@ -34,6 +69,7 @@ class DashboardApp(ttk.Window):
 
         self.current_user = None
         self.running = True
+        self.dashboard_hint = None
 
         self._configure_styles()
         self._create_layout()
@@ -86,7 +122,9 @@ class DashboardApp(ttk.Window):
     def show_frame(self, frame_name):
         if frame_name == "DashboardViewFrame" and not self.current_user:
             # --- FIX 2: Correct order of arguments for ToolTip ---
-            ToolTip(self.nav_buttons["DashboardViewFrame"], "Select a user from the 'User Status' page first.", bootstyle="danger-inverse", delay=100)
+            # Attach the hint once; every extra ToolTip would add another set of bindings to the button
+            if self.dashboard_hint is None:
+                self.dashboard_hint = ToolTip(self.nav_buttons["DashboardViewFrame"], "Select a user from the 'User Status' page first.", bootstyle="danger-inverse", delay=100)
             return
         
         frame = self.frames[frame_name]
@@ -99,14 +137,64 @@ class DashboardApp(ttk.Window):
         self.frames["DashboardViewFrame"].prepare_dashboard()
         self.show_frame("DashboardViewFrame")
 
+    def ensure_indexes(self):
+        # Idempotent; serves the dashboard's user+date range query and the status page's date match
+        try:
+            collection.create_index([("user_id", 1), ("date", 1)])
+            collection.create_index([("date", 1)])
+        except pymongo.errors.PyMongoError as e:
+            print(f"Could not create indexes: {e}")
+
     def continuously_update_user_statuses(self):
+        self.ensure_indexes()
         while self.running:
             try:
-                if "UserStatusFrame" in self.frames and self.frames["UserStatusFrame"].winfo_exists() and self.frames["UserStatusFrame"].winfo_viewable():
-                    self.frames["UserStatusFrame"].update_user_list()
-            except Exception as e:
-                print(f"Error in background update: {e}")
-            time.sleep(30)
+                self.watch_user_statuses()
+            except pymongo.errors.PyMongoError as e:
+                # Change streams need a replica set (or the server is not up yet); poll for a while,
+                # then try the stream again
+                print(f"User status change stream unavailable ({e}); polling instead.")
+                self.poll_user_statuses(time.monotonic() + STATUS_WATCH_RETRY_SECONDS)
+
+    def refresh_user_statuses(self):
+        # Returns the statuses shown, None when the page is hidden (no query is made), or False when the query failed
+        try:
+            if "UserStatusFrame" in self.frames and self.frames["UserStatusFrame"].winfo_exists() and self.frames["UserStatusFrame"].winfo_viewable():
+                return self.frames["UserStatusFrame"].update_user_list()
+        except Exception as e:
+            print(f"Error in background update: {e}")
+            return False
+        return None
+
+    def watch_user_statuses(self):
+        # Only new documents and actual status transitions; the tracker's $inc flushes and same-status
+        # heartbeats (which only move last_seen) are picked up by the sweep
+        pipeline = [{"$match": {"$or": [
+            {"operationType": {"$in": ["insert", "replace"]}},
+            {"operationType": "update", "updateDescription.updatedFields.status": {"$exists": True}},
+        ]}}]
+        dirty, last_refresh = True, time.monotonic()
+        with collection.watch(pipeline, max_await_time_ms=1000) as stream:
+            while self.running:
+                dirty = stream.try_next() is not None or dirty
+                now = time.monotonic()
+                # Changes are coalesced into one refresh per debounce window; the slow sweep still runs
+                # so users whose tracker went silent flip to "Connection timeout"
+                if (dirty and now - last_refresh >= STATUS_DEBOUNCE_SECONDS) or now - last_refresh >= STATUS_SWEEP_SECONDS:
+                    statuses = self.refresh_user_statuses()
+                    if statuses is not None:
+                        # A failed query stays dirty but still waits out the debounce window before retrying
+                        dirty, last_refresh = statuses is False, now
+
+    def poll_user_statuses(self, until):
+        backoff, last_statuses = STATUS_POLL_SECONDS, None
+        while self.running and time.monotonic() < until:
+            statuses = self.refresh_user_statuses()
+            if statuses is not None and statuses is not False:
+                # Double the wait while polls come back identical; any change snaps back to the base interval
+                backoff = min(backoff * 2, STATUS_POLL_MAX_SECONDS) if statuses == last_statuses else STATUS_POLL_SECONDS
+                last_statuses = statuses
+            time.sleep(backoff)
 
     def on_closing(self):
         self.running = False
@@ -116,6 +204,20 @@ class DashboardApp(ttk.Window):
 def format_seconds(seconds):
     return str(timedelta(seconds=int(seconds)))
 
+def format_seconds_array(seconds):
+    # Same H:MM:SS text as format_seconds (for totals under a day), for a whole column at once
+    seconds = np.asarray(seconds)
+    # np.char.zfill raises on zero-size arrays (numpy 2.x), and no users today is a normal state
+    if seconds.size == 0: return []
+    hours, rem = np.divmod(seconds.astype(np.int64), 3600)
+    minutes, secs = np.divmod(rem, 60)
+    hh_mm = np.char.add(np.char.add(hours.astype(str), ":"), np.char.zfill(minutes.astype(str), 2))
+    return np.char.add(np.char.add(hh_mm, ":"), np.char.zfill(secs.astype(str), 2)).tolist()
+
+def read_date(entry, default):
+    value = entry.entry.get().strip()
+    return value if DATE_RE.fullmatch(value) else default
+
 def create_kpi_card(parent, title, string_var, column):
     card = ttk.Frame(parent, style="Card.TFrame", padding=15)
     card.grid(row=0, column=column, sticky=EW, padx=10, pady=5)
@@ -160,10 +262,11 @@ class UserStatusFrame(ttk.Frame):
     def update_user_list(self):
         try:
             today_str = datetime.now().strftime("%Y-%m-%d")
-            pipeline = [{"$match": {"date": today_str}}, {"$project": {"user_id": 1, "status": 1, "last_seen": 1, "applications": 1, "offline_reason": 1}}]
-            users_data = list(collection.aggregate(pipeline))
-            user_statuses = []
-            for doc in users_data:
+            # Each user's total is summed server-side, so the applications maps never leave MongoDB
+            pipeline = [{"$match": {"date": today_str}}, {"$project": {"user_id": 1, "status": 1, "last_seen": 1, "offline_reason": 1, "total_seconds": APP_SECONDS_EXPR}}]
+            # Consume the cursor as it streams; each document is reduced to its row and then dropped
+            user_statuses, totals = [], []
+            for doc in collection.aggregate(pipeline, batchSize=256):
                 status, reason = doc.get('status', 'Offline'), doc.get('offline_reason', '')
                 last_seen = doc.get('last_seen')
 
@@ -174,11 +277,16 @@ class UserStatusFrame(ttk.Frame):
                 if status == "Online" and last_seen and (datetime.now(timezone.utc) - last_seen) > timedelta(minutes=2):
                     status, reason = "Offline", "Connection timeout"
 
-                user_statuses.append({"id": doc['user_id'], "status": status, "reason": reason, "time": format_seconds(sum(doc.get('applications', {}).values()))})
-            
+                user_statuses.append({"id": doc['user_id'], "status": status, "reason": reason})
+                totals.append(doc['total_seconds'])
+            for user, time_str in zip(user_statuses, format_seconds_array(np.asarray(totals, dtype=np.float64))):
+                user["time"] = time_str
+
             self.after(0, self.populate_tree, user_statuses)
+            return user_statuses
         except Exception as e:
             print(f"Error querying user statuses: {e}")
+            return False
 
     def populate_tree(self, user_statuses):
         self.user_tree.delete(*self.user_tree.get_children())
@@ -195,6 +303,8 @@ class DashboardViewFrame(ttk.Frame):
     def __init__(self, parent, controller):
         super().__init__(parent)
         self.controller = controller
+        self._load_seq = 0
+        self._cache = OrderedDict()  # (user_id, start, end) -> (daily frame, app totals), LRU order
         self._create_permanent_widgets()
 
     def _create_permanent_widgets(self):
@@ -226,12 +336,25 @@ class DashboardViewFrame(ttk.Frame):
         graphs_frame.pack(fill=BOTH, expand=True, pady=15)
         graphs_frame.grid_columnconfigure((0, 1), weight=1); graphs_frame.grid_rowconfigure(0, weight=1)
         
-        self.fig_bar, self.ax_bar = plt.subplots(figsize=(6, 5), dpi=100, facecolor="#2b2b2b")
+        # Plain Figures rather than pyplot: pyplot would also give each figure its own hidden Tk
+        # manager window, and the embedded FigureCanvasTkAgg is the only canvas these need.
+        self.fig_bar = Figure(figsize=(6, 5), dpi=100, facecolor="#2b2b2b", layout="constrained"); self.ax_bar = self.fig_bar.add_subplot()
+        # Bars are kept between refreshes and only rebuilt when the set of top apps changes
+        self.bars, self.bar_labels = None, None
+        self.ax_bar.set_facecolor("#333333"); self.ax_bar.set_xlabel("Total Hours", color="#fff"); self.ax_bar.tick_params(colors="#fff")
+        self.bar_message = self.ax_bar.text(0.5, 0.5, '', transform=self.ax_bar.transAxes, ha='center', va='center', color="#fff", visible=False)
         bar_chart_labelframe = ttk.Labelframe(graphs_frame, text="Application Usage", style="Card.TLabelframe")
         bar_chart_labelframe.grid(row=0, column=0, sticky=NSEW, padx=(0, 10))
         FigureCanvasTkAgg(self.fig_bar, master=bar_chart_labelframe).get_tk_widget().pack(fill=BOTH, expand=True, padx=10, pady=5)
         
-        self.fig_line, self.ax_line = plt.subplots(figsize=(6, 5), dpi=100, facecolor="#2b2b2b")
+        self.fig_line = Figure(figsize=(6, 5), dpi=100, facecolor="#2b2b2b", layout="constrained"); self.ax_line = self.fig_line.add_subplot()
+        # The trend lines, legend and grid are built once; refreshes only swap the line data
+        self.ax_line.set_facecolor("#333333"); self.ax_line.xaxis_date()
+        self.line_productive, = self.ax_line.plot([], [], marker='o', label='Productive', color='#28a745')
+        self.line_idle, = self.ax_line.plot([], [], marker='x', linestyle='--', label='Idle', color='#ffc107')
+        self.line_message = self.ax_line.text(0.5, 0.5, '', transform=self.ax_line.transAxes, ha='center', va='center', color="#fff", visible=False)
+        self.ax_line.set_ylabel("Hours", color="#fff"); self.ax_line.set_xlabel(""); self.ax_line.legend(facecolor="#333", labelcolor="#fff")
+        self.ax_line.tick_params(colors="#fff"); self.ax_line.tick_params(axis='x', rotation=25); self.ax_line.grid(True, linestyle='--', alpha=0.3)
         line_chart_labelframe = ttk.Labelframe(graphs_frame, text="Daily Trends", style="Card.TLabelframe")
         line_chart_labelframe.grid(row=0, column=1, sticky=NSEW, padx=(10, 0))
         FigureCanvasTkAgg(self.fig_line, master=line_chart_labelframe).get_tk_widget().pack(fill=BOTH, expand=True, padx=10, pady=5)
@@ -243,54 +366,127 @@ class DashboardViewFrame(ttk.Frame):
         self.load_data()
 
     def load_data(self):
-        query = {"user_id": self.controller.current_user, "date": {"$gte": self.start_date_entry.entry.get(), "$lte": self.end_date_entry.entry.get()}}
-        df = pd.DataFrame(list(collection.find(query)))
-        if df.empty:
+        now = datetime.now()
+        start_date = read_date(self.start_date_entry, (now - timedelta(days=7)).strftime('%Y-%m-%d'))
+        end_date = read_date(self.end_date_entry, now.strftime('%Y-%m-%d'))
+        user_id = self.controller.current_user
+        self._load_seq += 1
+        key = (user_id, start_date, end_date)
+        if key in self._cache:
+            self._cache.move_to_end(key)
+            self._show_data(*self._cache[key])
+            return
+        # Query on a worker thread; Tk and matplotlib are only touched back on the main loop
+        threading.Thread(target=self._load_worker, args=(self._load_seq, key), daemon=True).start()
+
+    def _load_worker(self, seq, key):
+        user_id, start_date, end_date = key
+        query = {"user_id": user_id, "date": {"$gte": start_date, "$lte": end_date}}
+        try:
+            # Fill the columns straight from the streaming cursor instead of materializing every document first
+            columns = {name: [] for name in DAILY_COLUMNS}
+            for doc in self.query_daily_totals(query):
+                for name, values in columns.items(): values.append(doc[name])
+            df = pd.DataFrame(columns).astype(DAILY_DTYPES)
+            result = (self.build_daily_frame(df), self.query_app_totals(query)) if not df.empty else (None, None)
+        except Exception as e:
+            print(f"Error loading dashboard data: {e}")
+            return
+        self.after(0, self._apply_data, seq, key, result)
+
+    def _apply_data(self, seq, key, result):
+        # Past days never change, so only ranges ending before today are cached
+        if key[2] < datetime.now().strftime("%Y-%m-%d"):
+            self._cache[key] = result
+            if len(self._cache) > DATA_CACHE_SIZE: self._cache.popitem(last=False)
+        # A newer Load Data superseded this result while it was in flight
+        if seq != self._load_seq: return
+        self._show_data(*result)
+
+    def _show_data(self, daily, app_series):
+        if daily is None:
             self.clear_visuals()
             return
-        self.update_kpis(df)
-        self.draw_app_chart(df)
-        self.draw_trends_chart(df)
+        self.update_kpis(daily, app_series)
+        self.draw_app_chart(app_series)
+        self.draw_trends_chart(daily)
+        self.redraw_charts()
+
+    def query_daily_totals(self, query):
+        # Each day arrives as two numbers; the applications map is summed server-side and never sent
+        pipeline = [
+            {"$match": query},
+            {"$sort": {"date": 1}},
+            {"$project": {
+                "_id": 0, "date": 1,
+                "idle_seconds": {"$ifNull": ["$total_idle_seconds", 0]},
+                "productive_seconds": APP_SECONDS_EXPR,
+            }},
+        ]
+        return collection.aggregate(pipeline, batchSize=256)
+
+    def build_daily_frame(self, df):
+        return df.set_index(pd.to_datetime(df.pop('date')))
+
+    def query_app_totals(self, query):
+        # Sum seconds per application server-side; only one row per app comes back, largest first
+        pipeline = [
+            {"$match": query},
+            {"$project": {"kv": {"$objectToArray": "$applications"}}},
+            {"$unwind": "$kv"},
+            {"$group": {"_id": "$kv.k", "seconds": {"$sum": "$kv.v"}}},
+            {"$sort": {"seconds": -1}},
+        ]
+        return pd.Series({doc["_id"].replace('_', '.'): doc["seconds"] for doc in collection.aggregate(pipeline)}, dtype="float64")
 
     def clear_visuals(self):
         self.total_time_var.set("00:00:00"); self.idle_time_var.set("00:00:00"); self.top_app_var.set("No Data")
-        for ax in [self.ax_bar, self.ax_line]:
-            ax.clear(); ax.set_facecolor("#333333"); ax.text(0.5, 0.5, 'No Data for Range', ha='center', color="#fff", va='center')
+        self._remove_bars()
+        self.bar_message.set_text('No Data for Range'); self.bar_message.set_visible(True)
+        self.line_productive.set_visible(False); self.line_idle.set_visible(False)
+        self.line_message.set_text('No Data for Range'); self.line_message.set_visible(True)
+        self.redraw_charts()
+
+    def redraw_charts(self):
+        # The draw_* methods only update artists; both canvases are queued here together so they
+        # render in the same idle pass instead of one chart appearing before the other
         self.fig_bar.canvas.draw_idle(); self.fig_line.canvas.draw_idle()
 
-    def update_kpis(self, df):
-        app_seconds, all_apps = 0, {}
-        for app_dict in df['applications'].dropna():
-            if isinstance(app_dict, dict):
-                app_seconds += sum(app_dict.values())
-                for app, time_val in app_dict.items(): all_apps[app] = all_apps.get(app, 0) + time_val
-        self.total_time_var.set(format_seconds(app_seconds))
-        self.idle_time_var.set(format_seconds(df['total_idle_seconds'].sum()))
-        self.top_app_var.set(max(all_apps, key=all_apps.get).replace('_', '.') if all_apps else "N/A")
-
-    def draw_app_chart(self, df):
-        self.ax_bar.clear(); self.ax_bar.set_facecolor("#333333")
-        all_apps = {}
-        for app_dict in df['applications'].dropna():
-            if isinstance(app_dict, dict):
-                for app, time_val in app_dict.items(): all_apps[app.replace('_', '.')] = all_apps.get(app.replace('_', '.'), 0) + time_val
-        if not all_apps:
-            self.ax_bar.text(0.5, 0.5, 'No App Data', ha='center', va='center', color="#fff"); self.fig_bar.canvas.draw_idle(); return
-        app_series = pd.Series(all_apps).sort_values().tail(10)
-        sns.barplot(x=app_series.values / 3600, y=app_series.index, ax=self.ax_bar, palette="viridis_r", orient='h')
-        self.ax_bar.set_xlabel("Total Hours", color="#fff"); self.ax_bar.set_ylabel(""); self.ax_bar.tick_params(colors="#fff")
-        self.fig_bar.tight_layout(); self.fig_bar.canvas.draw_idle()
-
-    def draw_trends_chart(self, df):
-        self.ax_line.clear(); self.ax_line.set_facecolor("#333333")
-        df['date'] = pd.to_datetime(df['date']); df = df.sort_values('date').set_index('date')
-        df['productive_hours'] = df['applications'].apply(lambda x: sum(x.values())/3600 if isinstance(x, dict) else 0)
-        df['idle_hours'] = df['total_idle_seconds'].fillna(0) / 3600
-        df['productive_hours'].plot(ax=self.ax_line, marker='o', label='Productive', color='#28a745')
-        df['idle_hours'].plot(ax=self.ax_line, marker='x', linestyle='--', label='Idle', color='#ffc107')
-        self.ax_line.set_ylabel("Hours", color="#fff"); self.ax_line.set_xlabel(""); self.ax_line.legend(facecolor="#333", labelcolor="#fff")
-        self.ax_line.tick_params(colors="#fff", axis='x', rotation=25); self.ax_line.grid(True, linestyle='--', alpha=0.3)
-        self.fig_line.tight_layout(); self.fig_line.canvas.draw_idle()
+    def update_kpis(self, daily, app_series):
+        self.total_time_var.set(format_seconds(app_series.sum()))
+        self.idle_time_var.set(format_seconds(daily['idle_seconds'].sum()))
+        self.top_app_var.set(app_series.index[0] if not app_series.empty else "N/A")
+
+    def draw_app_chart(self, app_series):
+        if app_series.empty:
+            self._remove_bars()
+            self.bar_message.set_text('No App Data'); self.bar_message.set_visible(True)
+            return
+        # Largest first from the bottom up, matching the old seaborn layout and viridis_r palette
+        top = app_series.head(10)
+        labels, hours = top.index.tolist(), top.to_numpy() / 3600
+        if labels == self.bar_labels:
+            for bar, width in zip(self.bars, hours): bar.set_width(width)
+        else:
+            self._remove_bars()
+            positions = np.arange(len(labels))
+            self.bars = self.ax_bar.barh(positions, hours, color=cm.viridis(np.linspace(0, 1, len(labels) + 2)[1:-1]))
+            self.ax_bar.set_yticks(positions); self.ax_bar.set_yticklabels(labels)
+            self.bar_labels = labels
+        self.bar_message.set_visible(False)
+        self.ax_bar.relim(); self.ax_bar.autoscale_view()
+
+    def _remove_bars(self):
+        if self.bars is not None: self.bars.remove()
+        self.bars = self.bar_labels = None
+        self.ax_bar.set_yticks([])
+
+    def draw_trends_chart(self, daily):
+        dates = daily.index.to_numpy()
+        self.line_productive.set_data(dates, daily['productive_seconds'].to_numpy() / 3600); self.line_productive.set_visible(True)
+        self.line_idle.set_data(dates, daily['idle_seconds'].to_numpy() / 3600); self.line_idle.set_visible(True)
+        self.line_message.set_visible(False)
+        self.ax_line.relim(); self.ax_line.autoscale_view()
 
 if __name__ == "__main__":
     app = DashboardApp()